@@ -1,102 +1,168 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, g, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import google.generativeai as genai
+from werkzeug.exceptions import RequestEntityTooLarge
 import base64
+import binascii
 import io
 import json
+import orjson
 import hashlib
+import threading
 import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache, wraps
 from PIL import Image
 import numpy as np
-from scipy import ndimage
 import psutil
 import os
-from config import config
+from config import config, tune_gc
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, used by jsonify and request.get_json"""
+    def dumps(self, obj, **kwargs):
+        # Datetimes pass through to Flask's default() to keep its formatting
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Initialize Flask app with configuration
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 config_name = os.environ.get('FLASK_ENV', 'default')
 app.config.from_object(config[config_name])
 
 # Enable CORS for all routes
 CORS(app, origins=app.config['CORS_ORIGINS'])
 
-# Configure Gemini AI
-genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-1.5-flash')  # Lightweight model
+# Configure Gemini AI on first use; google.generativeai pulls in grpc and
+# protobuf, which only the AI routes need
+@lru_cache(maxsize=1)
+def get_gemini_model():
+    """Return the shared Gemini model, importing and configuring the SDK once"""
+    import google.generativeai as genai
+    
+    genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
+    return genai.GenerativeModel('gemini-1.5-flash')  # Lightweight model
 
 # Memory and performance monitoring
+# (sampled at, percent) of the last psutil reading; races between request
+# threads only cost an extra reading, so no lock is needed
+_memory_sample = [float('-inf'), 0.0]
+MEMORY_SAMPLE_TTL = 1.0
+
 def monitor_memory():
     """Monitor and manage memory usage for t3.micro"""
-    memory_percent = psutil.virtual_memory().percent
+    # psutil parses /proc/meminfo on every call; reuse a reading for up to
+    # a second across requests
+    now = time.monotonic()
+    if now - _memory_sample[0] > MEMORY_SAMPLE_TTL:
+        _memory_sample[:] = [now, psutil.virtual_memory().percent]
+    memory_percent = _memory_sample[1]
     if memory_percent > 80:  # Approaching limit
         return True
     return False
 
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """Reject bodies over MAX_CONTENT_LENGTH with JSON on every route"""
+    return jsonify({'error': 'Request body too large'}), 413
+
 @app.before_request
 def check_resources():
     """Prevent memory overflow and set AI availability"""
     g.ai_enabled = not monitor_memory()
     if not g.ai_enabled:
         print("⚠️ High memory usage, AI features temporarily disabled")
+        # Cached layer states are the largest discretionary allocation
+        layer_cache.clear()
 
 # Caching system for Gemini responses
 class GeminiCache:
     def __init__(self, max_size=50):
-        self.cache = {}
+        self.cache = OrderedDict()
         self.max_size = max_size
-        self.access_times = {}
+        self.lock = threading.Lock()
     
     def get_image_hash(self, image_data):
         """Create hash for similar images"""
-        return hashlib.md5(image_data.encode() if isinstance(image_data, str) else image_data).hexdigest()[:8]
+        # BLAKE2b is faster than MD5 in software; 64 bits keeps accidental
+        # collisions (which would serve another image's analysis) negligible
+        return hashlib.blake2b(image_data.encode() if isinstance(image_data, str) else image_data, digest_size=8).hexdigest()
     
     def get(self, key):
         """Get cached result"""
-        if key in self.cache:
-            self.access_times[key] = time.time()
-            return self.cache[key]
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
         return None
     
     def set(self, key, value):
         """Store result with LRU eviction"""
-        if len(self.cache) >= self.max_size:
-            # Remove oldest entry
-            oldest_key = min(self.access_times.keys(), key=lambda k: self.access_times[k])
-            del self.cache[oldest_key]
-            del self.access_times[oldest_key]
-        
-        self.cache[key] = value
-        self.access_times[key] = time.time()
+        with self.lock:
+            self.cache[key] = value
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
 
 # Initialize cache
 gemini_cache = GeminiCache()
+# Downscaled JPEG bytes sent to Gemini, keyed by the same image hash
+optimized_image_cache = GeminiCache(max_size=20)
 
 # Rate limiting for API calls
 class APIRateLimit:
     def __init__(self, max_calls_per_minute=10):
         self.max_calls = max_calls_per_minute
-        self.calls = []
+        self.calls = deque()
+        self.lock = threading.Lock()
     
     def can_make_call(self):
-        now = time.time()
-        # Remove calls older than 1 minute
-        self.calls = [call_time for call_time in self.calls if now - call_time < 60]
-        
-        if len(self.calls) < self.max_calls:
-            self.calls.append(now)
-            return True
+        now = time.monotonic()
+        with self.lock:
+            # Remove calls older than 1 minute; calls are in time order, so
+            # they expire from the left
+            while self.calls and now - self.calls[0] >= 60:
+                self.calls.popleft()
+            
+            if len(self.calls) < self.max_calls:
+                self.calls.append(now)
+                return True
         return False
 
 rate_limiter = APIRateLimit()
 
-def base64_to_array(base64_string):
+_INV_255 = np.float32(1.0 / 255.0)
+
+# Guard against decompression bombs: PIL refuses images over twice this
+Image.MAX_IMAGE_PIXELS = app.config['MAX_IMAGE_PIXELS']
+
+def base64_exceeds(base64_string, max_bytes):
+    """Check whether a Base64 string decodes to more than max_bytes, without decoding it"""
+    return len(base64_string) * 3 // 4 > max_bytes
+
+def _sniff_image_formats(image_data):
+    """Return the PIL formats to try for image_data, or None to probe all."""
+    if image_data[:2] == b'\xff\xd8':
+        return ('JPEG',)
+    if image_data[:8] == b'\x89PNG\r\n\x1a\n':
+        return ('PNG',)
+    return None
+
+def base64_to_array(base64_string, max_dimension=None):
     """
     Convert Base64-encoded image to numpy array.
     
     Args:
         base64_string (str): Base64-encoded image string
+        max_dimension (int): Downscale images whose width or height exceeds this
         
     Returns:
         np.ndarray: Image array with shape [H, W, 3], normalized to [0, 1]
@@ -104,45 +170,211 @@ def base64_to_array(base64_string):
     # Decode base64 string
     image_data = base64.b64decode(base64_string)
     
-    # Convert to PIL Image
-    image = Image.open(io.BytesIO(image_data))
+    # Convert to PIL Image, sniffing the magic bytes so PIL goes straight to
+    # the right decoder instead of probing every registered plugin
+    image = Image.open(io.BytesIO(image_data), formats=_sniff_image_formats(image_data))
+    
+    # Bound decode cost and memory for oversized uploads; draft() lets libjpeg
+    # decode at a reduced scale instead of at full resolution
+    if max_dimension and max(image.size) > max_dimension:
+        image.draft('RGB', (max_dimension, max_dimension))
+        image.thumbnail((max_dimension, max_dimension))
     
     # Convert to RGB if necessary
     if image.mode != 'RGB':
         image = image.convert('RGB')
     
-    # Convert to numpy array and normalize to [0, 1]
-    image_array = np.array(image).astype(np.float32) / 255.0
+    # Convert and normalize to [0, 1] in a single fused pass over PIL's
+    # uint8 pixel buffer
+    image_array = np.multiply(np.asarray(image), _INV_255, dtype=np.float32)
+
+    return image_array
+
+def raw_to_array(raw_image, max_dimension=None):
+    """
+    Convert raw RGB or RGBA pixels to numpy array without decoding an image.
+    
+    Args:
+        raw_image (dict): {'h': height, 'w': width, 'data': Base64-encoded
+            row-major uint8 pixels with 3 or 4 channels}
+        max_dimension (int): Downscale images whose width or height exceeds this
+        
+    Returns:
+        np.ndarray: Image array with shape [H, W, 3], normalized to [0, 1]
+    """
+    height, width = int(raw_image['h']), int(raw_image['w'])
+    pixels = np.frombuffer(base64.b64decode(raw_image['data'], validate=True), dtype=np.uint8)
+    if pixels.size % (height * width) or pixels.size // (height * width) not in (3, 4):
+        raise ValueError('Raw image data does not match h x w x 3 or h x w x 4')
+    pixels = pixels.reshape(height, width, -1)
+    
+    # Downscale oversized canvases the same way base64_to_array does
+    if max_dimension and max(height, width) > max_dimension:
+        image = Image.fromarray(pixels)
+        image.thumbnail((max_dimension, max_dimension))
+        pixels = np.asarray(image)
+    
+    # Drop alpha (canvas getImageData is RGBA) and normalize to [0, 1] in a
+    # single fused pass
+    image_array = np.multiply(pixels[:, :, :3], _INV_255, dtype=np.float32)
     
     return image_array
 
-def array_to_base64(image_array):
+# Float32 elements scaled per strip by array_to_image_bytes (256KB); runs
+# on the encode pool threads, which would otherwise each keep a full-size
+# scratch buffer per image shape
+_ENCODE_STRIP_ELEMENTS = 64 * 1024
+
+def array_to_image_bytes(image_array, image_format='JPEG'):
     """
-    Convert numpy array to Base64-encoded image string.
+    Convert numpy array to encoded image bytes.
     
     Args:
-        image_array (np.ndarray): Image array with shape [H, W, 3], values in [0, 1]
+        image_array (np.ndarray): Image array with shape [H, W, 3]; layer
+            outputs are unclipped, so values outside [0, 1] are clipped here
+        image_format (str): 'JPEG' (default, fast and small) or 'PNG' (lossless)
         
     Returns:
-        str: Base64-encoded image string
+        bytes: Encoded image data
     """
-    # Denormalize to [0, 255] and convert to uint8
-    image_array = np.clip(image_array * 255.0, 0, 255).astype(np.uint8)
+    # Denormalize to [0, 255] and convert to uint8, scaling and clipping a
+    # strip of rows at a time in a small scratch buffer so only the final
+    # uint8 array is allocated at full size
+    height = image_array.shape[0]
+    pixels = np.empty(image_array.shape, dtype=np.uint8)
+    strip_rows = max(1, _ENCODE_STRIP_ELEMENTS // (image_array[0].size or 1))
+    scratch = _scratch_buffer((min(strip_rows, height),) + image_array.shape[1:])
+    for start in range(0, height, strip_rows):
+        rows = image_array[start:start + strip_rows]
+        scaled = scratch[:len(rows)]
+        np.multiply(rows, np.float32(255.0), out=scaled)
+        np.clip(scaled, 0, 255, out=scaled)
+        pixels[start:start + len(rows)] = scaled
+    image_array = pixels
     
     # Convert to PIL Image
     image = Image.fromarray(image_array)
     
-    # Convert to base64
+    # Encode image; JPEG is much cheaper than PNG's DEFLATE for previews,
+    # and lossless PNG uses the fastest zlib level
     buffer = io.BytesIO()
-    image.save(buffer, format='PNG')
-    image_data = buffer.getvalue()
+    if image_format == 'JPEG':
+        image.save(buffer, format='JPEG', quality=85)
+    elif image_format == 'PNG':
+        image.save(buffer, format='PNG', compress_level=1)
+    else:
+        image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+def array_to_base64(image_array, image_format='JPEG'):
+    """
+    Convert numpy array to Base64-encoded image string.
     
-    return base64.b64encode(image_data).decode('utf-8')
+    Args:
+        image_array (np.ndarray): Image array with shape [H, W, 3], values in [0, 1]
+        image_format (str): 'JPEG' (default) or 'PNG'
+        
+    Returns:
+        str: Base64-encoded image string
+    """
+    return base64.b64encode(array_to_image_bytes(image_array, image_format)).decode('ascii')
+
+def build_multipart_response(manifest, image_parts, image_format='JPEG'):
+    """
+    Build a multipart/mixed response from a JSON manifest and raw image parts.
+    
+    The first part is the JSON manifest, followed by one image part per
+    layer in layer order.
+    
+    Args:
+        manifest (dict): JSON-serializable response metadata
+        image_parts (list): Encoded image bytes, one entry per layer
+        image_format (str): Format of the image parts, 'JPEG' or 'PNG'
+        
+    Returns:
+        Response: multipart/mixed Flask response
+    """
+    boundary = uuid.uuid4().hex
+    delimiter = f'--{boundary}\r\n'.encode('ascii')
+    
+    chunks = [delimiter, b'Content-Type: application/json\r\n\r\n', orjson.dumps(manifest), b'\r\n']
+    for layer_idx, image_bytes in enumerate(image_parts):
+        chunks.append(delimiter)
+        chunks.append(f'Content-Type: image/{image_format.lower()}\r\n'
+                      f'Content-ID: <layer-{layer_idx}>\r\n\r\n'.encode('ascii'))
+        chunks.append(image_bytes)
+        chunks.append(b'\r\n')
+    chunks.append(f'--{boundary}--\r\n'.encode('ascii'))
+    
+    return Response(b''.join(chunks), mimetype=f'multipart/mixed; boundary={boundary}')
+
+# Predefined 3x3 kernels, built once at import time
+_KERNELS = {
+    'sharpen': np.array([
+        [0, -1, 0],
+        [-1, 5, -1],
+        [0, -1, 0]
+    ], dtype=np.float32),
+    'blur': np.ones((3, 3), dtype=np.float32) / 9,
+    'sobel_x': np.array([
+        [-1, 0, 1],
+        [-2, 0, 2],
+        [-1, 0, 1]
+    ], dtype=np.float32),
+    'sobel_y': np.array([
+        [-1, -2, -1],
+        [0, 0, 0],
+        [1, 2, 1]
+    ], dtype=np.float32),
+    'gaussian': np.array([
+        [1/16, 2/16, 1/16],
+        [2/16, 4/16, 2/16],
+        [1/16, 2/16, 1/16]
+    ], dtype=np.float32),
+    'laplacian': np.array([
+        [0, -1, 0],
+        [-1, 4, -1],
+        [0, -1, 0]
+    ], dtype=np.float32),
+    'emboss': np.array([
+        [-2, -1, 0],
+        [-1, 1, 1],
+        [0, 1, 2]
+    ], dtype=np.float32),
+    'edge_enhance': np.array([
+        [0, 0, 0],
+        [-1, 1, 0],
+        [0, 0, 0]
+    ], dtype=np.float32),
+    'identity': np.array([
+        [0, 0, 0],
+        [0, 1, 0],
+        [0, 0, 0]
+    ], dtype=np.float32),
+}
+_KERNELS['default'] = _KERNELS['sharpen']
+
+# Rank-1 kernels as (column, row) factors: kernel == np.outer(column, row)
+_SEPARABLE_KERNELS = {
+    'blur': (np.full(3, 1/3, dtype=np.float32), np.full(3, 1/3, dtype=np.float32)),
+    'gaussian': (np.array([1, 2, 1], dtype=np.float32) / 4, np.array([1, 2, 1], dtype=np.float32) / 4),
+    'sobel_x': (np.array([1, 2, 1], dtype=np.float32), np.array([-1, 0, 1], dtype=np.float32)),
+    'sobel_y': (np.array([-1, 0, 1], dtype=np.float32), np.array([1, 2, 1], dtype=np.float32)),
+}
+
+# Kernels are shared across requests, so guard them against modification
+for _kernel in _KERNELS.values():
+    _kernel.setflags(write=False)
+for _factors in _SEPARABLE_KERNELS.values():
+    for _kernel in _factors:
+        _kernel.setflags(write=False)
 
 def get_kernel(kernel_type, kernel_size=3):
     """
     Returns a numpy array representing a kernel based on the kernel type.
     
+    Kernels are shared, read-only arrays.
+    
     Args:
         kernel_type (str): Type of kernel to generate
         kernel_size (int): Size of the kernel (default: 3)
@@ -150,124 +382,172 @@ def get_kernel(kernel_type, kernel_size=3):
     Returns:
         np.ndarray: kernel array
     """
-    if kernel_type == 'sharpen' or kernel_type == 'default':
-        kernel = np.array([
-            [0, -1, 0],
-            [-1, 5, -1],
-            [0, -1, 0]
-        ], dtype=np.float32)
-    
-    elif kernel_type == 'blur':
-        kernel = np.ones((3, 3), dtype=np.float32) / 9
-    
-    elif kernel_type == 'sobel_x':
-        kernel = np.array([
-            [-1, 0, 1],
-            [-2, 0, 2],
-            [-1, 0, 1]
-        ], dtype=np.float32)
-    
-    elif kernel_type == 'sobel_y':
-        kernel = np.array([
-            [-1, -2, -1],
-            [0, 0, 0],
-            [1, 2, 1]
-        ], dtype=np.float32)
-    
-    elif kernel_type == 'gaussian':
-        kernel = np.array([
-            [1/16, 2/16, 1/16],
-            [2/16, 4/16, 2/16],
-            [1/16, 2/16, 1/16]
-        ], dtype=np.float32)
-    
-    elif kernel_type == 'laplacian':
-        kernel = np.array([
-            [0, -1, 0],
-            [-1, 4, -1],
-            [0, -1, 0]
-        ], dtype=np.float32)
-    
-    elif kernel_type == 'emboss':
-        kernel = np.array([
-            [-2, -1, 0],
-            [-1, 1, 1],
-            [0, 1, 2]
-        ], dtype=np.float32)
-    
-    elif kernel_type == 'edge_enhance':
-        kernel = np.array([
-            [0, 0, 0],
-            [-1, 1, 0],
-            [0, 0, 0]
-        ], dtype=np.float32)
-    
-    elif kernel_type == 'identity':
-        kernel = np.array([
-            [0, 0, 0],
-            [0, 1, 0],
-            [0, 0, 0]
-        ], dtype=np.float32)
+    # Default to sharpen kernel
+    return _KERNELS.get(kernel_type, _KERNELS['sharpen'])
+
+# Per-thread float32 scratch buffers keyed by shape, reused for the padded
+# copies made by every conv/pool layer instead of allocating (and page
+# faulting) a fresh multi-megabyte array each time. Each thread keeps at most
+# SCRATCH_MAX_BYTES, evicting least recently used shapes
+_scratch = threading.local()
+_SCRATCH_MAX_BYTES = app.config['SCRATCH_MAX_BYTES']
+
+def _scratch_buffer(shape):
+    """
+    Return this thread's float32 scratch buffer for shape.
     
-    else:
-        # Default to sharpen kernel
-        kernel = np.array([
-            [0, -1, 0],
-            [-1, 5, -1],
-            [0, -1, 0]
-        ], dtype=np.float32)
-    
-    return kernel
-
-def apply_convolution(image_array, kernel, stride=1, padding=1):
-    """Apply convolution using scipy.ndimage"""
-    # Add padding if needed
-    if padding > 0:
-        image_array = np.pad(image_array, ((padding, padding), (padding, padding), (0, 0)), mode='edge')
-    
-    # Apply convolution to each channel
-    result_channels = []
-    for c in range(image_array.shape[2]):
-        convolved = ndimage.convolve(image_array[:, :, c], kernel, mode='constant')
-        # Apply stride by sub-sampling
-        if stride > 1:
-            convolved = convolved[::stride, ::stride]
-        result_channels.append(convolved)
-    
-    # Stack channels back together
-    result = np.stack(result_channels, axis=2)
+    The contents are only valid until the next _scratch_buffer call for the
+    same shape on this thread, so callers must not return it or views of it.
+    """
+    buffers = getattr(_scratch, 'buffers', None)
+    if buffers is None:
+        buffers = _scratch.buffers = OrderedDict()
+        _scratch.nbytes = 0
+    
+    buffer = buffers.get(shape)
+    if buffer is not None:
+        buffers.move_to_end(shape)
+        return buffer
+    
+    buffer = np.empty(shape, dtype=np.float32)
+    if buffer.nbytes > _SCRATCH_MAX_BYTES:
+        # Too large to keep; used once and freed by the caller
+        return buffer
+    while buffers and _scratch.nbytes + buffer.nbytes > _SCRATCH_MAX_BYTES:
+        _scratch.nbytes -= buffers.popitem(last=False)[1].nbytes
+    buffers[shape] = buffer
+    _scratch.nbytes += buffer.nbytes
+    return buffer
+
+def _pad_into_scratch(image_array, edge=0, zero_h=0, zero_w=0):
+    """
+    Copy image_array into a scratch buffer, surrounded first by `edge`
+    rows/columns of edge replication (np.pad mode='edge') and then by a zero
+    border of zero_h rows and zero_w columns (np.pad mode='constant').
+    """
+    h, w, channels = image_array.shape
+    inner_h, inner_w = h + 2 * edge, w + 2 * edge
+    buffer = _scratch_buffer((inner_h + 2 * zero_h, inner_w + 2 * zero_w, channels))
+    
+    # Zero border
+    buffer[:zero_h] = 0
+    buffer[zero_h + inner_h:] = 0
+    buffer[zero_h:zero_h + inner_h, :zero_w] = 0
+    buffer[zero_h:zero_h + inner_h, zero_w + inner_w:] = 0
+    
+    # Image, then edge rows, then edge columns (which also fill the corners)
+    inner = buffer[zero_h:zero_h + inner_h, zero_w:zero_w + inner_w]
+    inner[edge:edge + h, edge:edge + w] = image_array
+    if edge:
+        inner[:edge, edge:edge + w] = image_array[:1]
+        inner[edge + h:, edge:edge + w] = image_array[-1:]
+        inner[:, :edge] = inner[:, edge:edge + 1]
+        inner[:, edge + w:] = inner[:, edge + w - 1:edge + w]
+    return buffer
+
+def _convolve_taps(source, kernel, stride_h=1, stride_w=1):
+    """
+    Convolve all channels at once as a sum of shifted taps. source already
+    carries a border of kernel // 2 on each side; only the strided output
+    positions are computed.
+    """
+    kernel_h, kernel_w = kernel.shape
+    h = source.shape[0] - 2 * (kernel_h // 2)
+    w = source.shape[1] - 2 * (kernel_w // 2)
+    
+    # Accumulate weight * shifted window per nonzero tap, so sparse kernels
+    # like edge_enhance (2 taps) cost only their nonzeros. The kernel is
+    # flipped for convolution. The first tap writes the result directly, so
+    # no zero-filled accumulator or extra add pass is needed
+    flipped = kernel[::-1, ::-1]
+    result = None
+    for i in range(kernel_h):
+        for j in range(kernel_w):
+            weight = flipped[i, j]
+            if weight == 0:
+                continue
+            window = source[i:i + h:stride_h, j:j + w:stride_w]
+            if result is None:
+                result = np.multiply(window, weight, dtype=np.float32)
+                scratch = np.empty_like(result)
+            else:
+                np.multiply(window, weight, out=scratch)
+                result += scratch
+    
+    if result is None:
+        result = np.zeros(((h - 1) // stride_h + 1, (w - 1) // stride_w + 1, source.shape[2]), dtype=np.float32)
     return result
 
+def apply_convolution(image_array, kernel, stride=1, padding=1, separable=None):
+    """
+    Apply convolution to all channels at once.
+    
+    Matches scipy.ndimage.convolve(mode='constant') on the padded image: the
+    output has the padded image's size, with zeros assumed beyond its border.
+    
+    Args:
+        image_array (np.ndarray): Image array with shape [H, W, C]
+        kernel (np.ndarray): 2D kernel
+        stride (int): Output sub-sampling step
+        padding (int): Edge padding added before convolving
+        separable (tuple): Optional (column, row) 1D factors of the kernel;
+            when given, two 1D passes replace the 2D one
+    """
+    padding = max(padding, 0)
+    kernel_h, kernel_w = kernel.shape
+    
+    # Identity kernel: the output is the (padded) input, so skip the taps
+    if np.count_nonzero(kernel) == 1 and kernel[kernel_h // 2, kernel_w // 2] == 1:
+        source = _pad_into_scratch(image_array, padding)
+        return source[::stride, ::stride].copy()
+    
+    # Rank-1 kernels: a vertical then a horizontal 1D pass (3 + 3 taps
+    # instead of 9 for a 3x3 kernel)
+    if separable is not None:
+        column, row = separable
+        source = _pad_into_scratch(image_array, padding, zero_h=len(column) // 2)
+        result = _convolve_taps(source, column[:, np.newaxis], stride, 1)
+        source = _pad_into_scratch(result, zero_w=len(row) // 2)
+        return _convolve_taps(source, row[np.newaxis, :], 1, stride)
+    
+    # Edge padding and the zero border are written into one scratch buffer
+    source = _pad_into_scratch(image_array, padding, kernel_h // 2, kernel_w // 2)
+    return _convolve_taps(source, kernel, stride, stride)
+
 def apply_pooling(image_array, pool_type='max', kernel_size=2, stride=None, padding=0):
     """Apply max or average pooling"""
     if stride is None:
         stride = kernel_size
     
-    h, w, c = image_array.shape
-    
-    # Add padding if needed
+    # Add padding if needed (into a scratch buffer; the result below is a
+    # fresh array)
     if padding > 0:
-        image_array = np.pad(image_array, ((padding, padding), (padding, padding), (0, 0)), mode='edge')
-        h, w = image_array.shape[:2]
+        image_array = _pad_into_scratch(image_array, padding)
+    
+    h, w = image_array.shape[:2]
     
     # Calculate output dimensions
     out_h = (h - kernel_size) // stride + 1
     out_w = (w - kernel_size) // stride + 1
+
+    # Combine the kH * kW strided shifts of the input elementwise: one
+    # vectorized pass per window offset instead of a Python loop over the
+    # output grid, and much faster than reducing a sliding-window view
+    span_h = (out_h - 1) * stride + 1
+    span_w = (out_w - 1) * stride + 1
+    result = None
+    for i in range(kernel_size):
+        for j in range(kernel_size):
+            shifted = image_array[i:i + span_h:stride, j:j + span_w:stride]
+            if result is None:
+                result = shifted.astype(np.float32)
+            elif pool_type == 'max':
+                np.maximum(result, shifted, out=result)
+            else:
+                np.add(result, shifted, out=result)
     
-    result = np.zeros((out_h, out_w, c), dtype=np.float32)
-    
-    for i in range(out_h):
-        for j in range(out_w):
-            h_start, h_end = i * stride, i * stride + kernel_size
-            w_start, w_end = j * stride, j * stride + kernel_size
-            
-            pool_region = image_array[h_start:h_end, w_start:w_end, :]
-            
-            if pool_type == 'max':
-                result[i, j, :] = np.max(pool_region, axis=(0, 1))
-            elif pool_type == 'avg':
-                result[i, j, :] = np.mean(pool_region, axis=(0, 1))
-    
+    if pool_type == 'avg':
+        result /= kernel_size * kernel_size
     return result
 
 def optimize_image_for_gemini(image_base64, max_size=128):
@@ -279,12 +559,10 @@ def optimize_image_for_gemini(image_base64, max_size=128):
     image = image.resize((max_size, max_size))
     image = image.convert('RGB')
     
-    # Compress for API
+    # Compress for API; the bytes are sent as-is, so skip a Base64 round trip
     buffer = io.BytesIO()
     image.save(buffer, format='JPEG', quality=60)
-    optimized_data = buffer.getvalue()
-    
-    return base64.b64encode(optimized_data).decode('utf-8')
+    return buffer.getvalue()
 
 @lru_cache(maxsize=20)
 def get_template_suggestions(image_hash):
@@ -329,7 +607,7 @@ def test_ai():
     
     try:
         # Simple test prompt
-        response = model.generate_content("Say 'AI is working!' in one sentence.")
+        response = get_gemini_model().generate_content("Say 'AI is working!' in one sentence.")
         return jsonify({
             'status': 'success',
             'message': 'Gemini AI is working correctly!',
@@ -362,6 +640,7 @@ def analyze_image_ai():
     print(f"🔍 Content-Type: {request.content_type}")
     print(f"🔍 Headers: {dict(request.headers)}")
     
+    image_base64 = None
     try:
         data = request.get_json()
         print(f"🔍 JSON data received: {data is not None}")
@@ -376,6 +655,9 @@ def analyze_image_ai():
         if not image_base64:
             return jsonify({'error': 'No image_base64 provided'}), 400
         
+        if base64_exceeds(image_base64, app.config['MAX_IMAGE_BYTES']):
+            return jsonify({'error': 'Image too large'}), 413
+        
         # Check if AI is available
         if not g.ai_enabled:
             return jsonify(get_template_suggestions('fallback'))
@@ -390,9 +672,12 @@ def analyze_image_ai():
         if not rate_limiter.can_make_call():
             return jsonify(get_template_suggestions(image_hash))
         
-        # Optimize image for Gemini
-        optimized_image_base64 = optimize_image_for_gemini(image_base64)
-        optimized_image_data = base64.b64decode(optimized_image_base64)
+        # Optimize image for Gemini, reusing the result for retries of the
+        # same image (e.g. after a rate-limited or failed call)
+        optimized_image_data = optimized_image_cache.get(image_hash)
+        if optimized_image_data is None:
+            optimized_image_data = optimize_image_for_gemini(image_base64)
+            optimized_image_cache.set(image_hash, optimized_image_data)
         
         # Prepare prompt for Gemini
         prompt = """
@@ -419,7 +704,7 @@ def analyze_image_ai():
         """
         
         # Call Gemini API
-        response = model.generate_content([
+        response = get_gemini_model().generate_content([
             prompt,
             {
                 "mime_type": "image/jpeg",
@@ -447,16 +732,209 @@ def analyze_image_ai():
             # Fallback to template if JSON parsing fails
             return jsonify(get_template_suggestions(image_hash))
         
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         print(f"Gemini API error: {str(e)}")
         # Fallback to template suggestions
         image_hash = gemini_cache.get_image_hash(image_base64) if image_base64 else 'error'
         return jsonify(get_template_suggestions(image_hash))
 
+# LRU cache of intermediate pipeline states
+class LayerCache:
+    """
+    Caches the state after each layer, keyed by image hash and layer prefix.
+    
+    Clients usually resend the same image with one layer added or changed, so
+    a request can resume from the longest cached prefix instead of
+    recomputing every layer. Cached arrays are never modified.
+    
+    Entries are evicted once there are more than max_size of them or they
+    hold more than max_bytes: each state's array (its first element) plus the
+    encoded previews of its encode futures (its last element). Consecutive
+    prefixes share futures, so each preview is counted once, when it is done.
+    """
+    def __init__(self, max_size=16, max_bytes=64 * 1024 * 1024):
+        self.cache = OrderedDict()
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        # encode future -> [number of cached states holding it, preview bytes]
+        self.futures = {}
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        """Get cached state"""
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        return None
+    
+    def set(self, key, value):
+        """Store state with LRU eviction"""
+        new_futures = []
+        with self.lock:
+            if key in self.cache:
+                self._drop(self.cache.pop(key))
+            if value[0].nbytes > self.max_bytes:
+                return
+            self.cache[key] = value
+            self.nbytes += value[0].nbytes
+            for future in value[-1]:
+                if future in self.futures:
+                    self.futures[future][0] += 1
+                else:
+                    self.futures[future] = [1, 0]
+                    new_futures.append(future)
+            self._evict()
+        # Outside the lock: the callback runs immediately for done futures
+        for future in new_futures:
+            future.add_done_callback(self._count_preview)
+    
+    def discard(self, key):
+        """Remove a state if it is cached"""
+        with self.lock:
+            if key in self.cache:
+                self._drop(self.cache.pop(key))
+    
+    def clear(self):
+        """Remove every cached state"""
+        with self.lock:
+            self.cache.clear()
+            self.futures.clear()
+            self.nbytes = 0
+    
+    def _count_preview(self, future):
+        """Add a finished preview's size, evicting if that exceeds max_bytes"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        size = len(future.result())
+        with self.lock:
+            entry = self.futures.get(future)
+            if entry is not None and not entry[1]:
+                entry[1] = size
+                self.nbytes += size
+                self._evict()
+    
+    def _evict(self):
+        """Drop least recently used states until within both limits; lock held"""
+        while self.cache and (len(self.cache) > self.max_size or self.nbytes > self.max_bytes):
+            self._drop(self.cache.popitem(last=False)[1])
+    
+    def _drop(self, value):
+        """Release a removed state's bytes; lock held"""
+        self.nbytes -= value[0].nbytes
+        for future in value[-1]:
+            entry = self.futures[future]
+            entry[0] -= 1
+            if not entry[0]:
+                self.nbytes -= entry[1]
+                del self.futures[future]
+
+layer_cache = LayerCache(max_size=app.config['LAYER_CACHE_SIZE'], max_bytes=app.config['LAYER_CACHE_MAX_BYTES'])
+
+# Request preview_format values and the PIL format each one encodes to
+PREVIEW_FORMATS = {'jpeg': 'JPEG', 'png': 'PNG'}
+
+# Layer types handled by process_layers
+SUPPORTED_LAYER_TYPES = frozenset(['conv', 'maxpool', 'avgpool', 'relu', 'batchnorm', 'dropout'])
+
+# Random generator for dropout masks (PCG64; faster than the legacy np.random API)
+_rng = np.random.default_rng()
+
+# Shared pool for layer image encoding (PIL releases the GIL while encoding)
+_encode_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+
+def apply_layer(image_array, layer):
+    """
+    Apply a single layer to an image array.
+    
+    Args:
+        image_array (np.ndarray): Input array with shape [H, W, C]; never modified
+        layer (dict): Layer configuration
+        
+    Returns:
+        tuple: (output array, kernel_size, stride) where kernel_size and stride
+            are 1 for layers that don't grow the receptive field
+    """
+    layer_type = layer.get('type')
+    kernel_size = 1
+    stride = 1
+    
+    if layer_type == 'conv':
+        # Convolution layer
+        kernel_type = layer.get('kernel_type', 'default')
+        stride = layer.get('stride', 1)
+        padding = layer.get('padding', 1)
+        
+        kernel = get_kernel(kernel_type)
+        kernel_size = kernel.shape[0]
+        
+        # Apply convolution
+        image_array = apply_convolution(image_array, kernel, stride, padding, _SEPARABLE_KERNELS.get(kernel_type))
+        
+    elif layer_type == 'maxpool':
+        # Max pooling layer
+        kernel_size = layer.get('kernel_size', 2)
+        stride = layer.get('stride', kernel_size)
+        padding = layer.get('padding', 0)
+        
+        image_array = apply_pooling(image_array, 'max', kernel_size, stride, padding)
+        
+    elif layer_type == 'avgpool':
+        # Average pooling layer
+        kernel_size = layer.get('kernel_size', 2)
+        stride = layer.get('stride', kernel_size)
+        padding = layer.get('padding', 0)
+        
+        image_array = apply_pooling(image_array, 'avg', kernel_size, stride, padding)
+        
+    elif layer_type == 'relu':
+        # ReLU activation; decoded images and most layer outputs (pooling
+        # or ReLU of such input) are already non-negative, and a min()
+        # scan is far cheaper than writing an identical copy
+        if image_array.min() < 0:
+            image_array = np.maximum(0, image_array)
+        
+    elif layer_type == 'batchnorm':
+        # Simplified batch normalization; the centered array is reused
+        # for the variance and normalized in place. Both per-channel sums
+        # are BLAS matrix-vector products over the [H*W, C] view, which are
+        # faster and more accurate than np.mean / einsum reductions
+        h, w, channels = image_array.shape
+        ones = np.ones(h * w, dtype=np.float32)
+        mean = ones @ image_array.reshape(h * w, channels) / (h * w)
+        centered = image_array - mean
+        var = ones @ np.square(centered.reshape(h * w, channels)) / (h * w)
+        centered *= 1.0 / (np.sqrt(var) + 1e-8)
+        image_array = centered
+        
+    elif layer_type == 'dropout':
+        # Simplified dropout for demonstration
+        dropout_rate = layer.get('dropout_rate', 0.1)
+        if dropout_rate > 0:
+            # Rates that are whole multiples of 1/256 (0.25, 0.5, ...) are
+            # drawn as random bytes, about twice as fast as float32 draws
+            threshold = dropout_rate * 256
+            if threshold == int(threshold):
+                mask = _rng.integers(0, 256, size=image_array.shape, dtype=np.uint8) >= int(threshold)
+            else:
+                mask = _rng.random(image_array.shape, dtype=np.float32) > dropout_rate
+            image_array = image_array * mask
+    
+    return image_array, kernel_size, stride
+
 @app.route('/process-layers', methods=['POST'])
 def process_layers():
     """
     Enhanced POST endpoint for processing image layers with optional AI insights.
+    
+    By default all layers are returned in one JSON object. ?encoding=binary
+    returns a multipart body with raw image parts, and ?encoding=ndjson
+    streams one JSON record per layer as soon as it is ready, followed by a
+    final {"success": true, "done": true} record. Layer previews are JPEG
+    unless the body sets "preview_format": "png" for lossless output.
     """
     try:
         data = request.get_json()
@@ -465,110 +943,146 @@ def process_layers():
             return jsonify({'error': 'No JSON data provided'}), 400
         
         image_base64 = data.get('image_base64')
+        # Optional raw pixels ({'h', 'w', 'data'}) skip image decoding entirely
+        raw_image = data.get('raw')
         layers = data.get('layers', [])
         request_ai_insights = data.get('ai_insights', False)
+        encoding = request.args.get('encoding')
+        binary_output = encoding == 'binary'
+        stream_output = encoding == 'ndjson'
+        preview_format = str(data.get('preview_format', 'jpeg')).lower()
+        if preview_format not in PREVIEW_FORMATS:
+            return jsonify({'error': f'Unsupported preview_format: {preview_format}'}), 400
+        image_format = PREVIEW_FORMATS[preview_format]
         
-        if not image_base64:
+        if raw_image is not None:
+            if not isinstance(raw_image, dict) or not all(key in raw_image for key in ('h', 'w', 'data')):
+                return jsonify({'error': 'raw must provide h, w and data'}), 400
+            height, width, raw_data = raw_image['h'], raw_image['w'], raw_image['data']
+            if not all(type(size) is int and size > 0 for size in (height, width)):
+                return jsonify({'error': 'raw h and w must be positive integers'}), 400
+            if not isinstance(raw_data, str):
+                return jsonify({'error': 'raw data must be a Base64 string'}), 400
+            # Decoded length of the Base64 data, without decoding it
+            data_length = len(raw_data) * 3 // 4 - raw_data[-2:].count('=')
+            if len(raw_data) % 4 or data_length not in (height * width * 3, height * width * 4):
+                return jsonify({'error': 'raw data does not match h x w x 3 or h x w x 4'}), 400
+        elif not image_base64:
             return jsonify({'error': 'No image_base64 data provided'}), 400
         
+        # Reject oversized images before decoding anything
+        payload = raw_image['data'] if raw_image is not None else image_base64
+        if base64_exceeds(payload, app.config['MAX_IMAGE_BYTES']):
+            return jsonify({'error': 'Image too large'}), 413
+        
         if not layers:
             return jsonify({'error': 'No layers array provided'}), 400
         
-        # Convert to numpy array
-        current_array = base64_to_array(image_base64)
+        # Validate the whole pipeline before decoding or running any layer
+        for layer in layers:
+            layer_type = layer.get('type')
+            if layer_type not in SUPPORTED_LAYER_TYPES:
+                return jsonify({'error': f'Unknown layer type: {layer_type}'}), 400
         
-        # Initialize results
-        results = []
-        receptive_field = 1
-        jump = 1
+        if raw_image is not None:
+            image_key = f"raw:{raw_image['h']}x{raw_image['w']}:{raw_image['data']}"
+        else:
+            image_key = image_base64
+        image_hash = hashlib.blake2b(image_key.encode('ascii'), digest_size=16).hexdigest()
+        cache_base = (image_hash, image_format, binary_output)
+        layer_keys = [orjson.dumps(layer, option=orjson.OPT_SORT_KEYS) for layer in layers]
         
-        # Process each layer
-        for layer_idx, layer in enumerate(layers):
-            layer_type = layer.get('type')
-            input_shape = list(current_array.shape)
+        def iter_layers():
+            """Yield (layer, layer_result, encode_future) for every layer in order"""
+            # Resume from the longest cached prefix of this pipeline, if any;
+            # the empty prefix holds the decoded image, so a new pipeline on
+            # the same image still skips decoding
+            cached_state = None
+            for prefix_len in range(len(layers), -1, -1):
+                cache_key = (cache_base, tuple(layer_keys[:prefix_len]))
+                cached_state = layer_cache.get(cache_key)
+                if cached_state is None:
+                    continue
+                # A failed encode must not be replayed to every later request;
+                # drop the state and fall back to a shorter prefix
+                if any(future.done() and future.exception() is not None for future in cached_state[4]):
+                    layer_cache.discard(cache_key)
+                    cached_state = None
+                    continue
+                break
             
-            if layer_type == 'conv':
-                # Convolution layer
-                kernel_type = layer.get('kernel_type', 'default')
-                stride = layer.get('stride', 1)
-                padding = layer.get('padding', 1)
-                
-                kernel = get_kernel(kernel_type)
-                kernel_size = kernel.shape[0]
-                
-                # Apply convolution
-                current_array = apply_convolution(current_array, kernel, stride, padding)
-                
-                # Update receptive field and jump
-                receptive_field = receptive_field + (kernel_size - 1) * jump
-                jump = jump * stride
-                
-            elif layer_type == 'maxpool':
-                # Max pooling layer
-                kernel_size = layer.get('kernel_size', 2)
-                stride = layer.get('stride', kernel_size)
-                padding = layer.get('padding', 0)
+            if cached_state is not None:
+                current_array, receptive_field, jump, layer_results, encode_futures = cached_state
+                layer_results = list(layer_results)
+                encode_futures = list(encode_futures)
+                yield from zip(layers, layer_results, encode_futures)
+            else:
+                # Convert to numpy array
+                if raw_image is not None:
+                    current_array = raw_to_array(raw_image, app.config['MAX_IMAGE_DIMENSION'])
+                else:
+                    current_array = base64_to_array(image_base64, app.config['MAX_IMAGE_DIMENSION'])
+                layer_results = []
+                encode_futures = []
+                receptive_field = 1
+                jump = 1
+                layer_cache.set((cache_base, ()), (current_array, receptive_field, jump, (), ()))
+            
+            # Dropout is random, so nothing from the first dropout layer on is cached
+            cacheable = True
+            
+            # Process each remaining layer
+            for layer_idx in range(len(layer_results), len(layers)):
+                layer = layers[layer_idx]
+                layer_type = layer.get('type')
+                input_shape = list(current_array.shape)
                 
-                current_array = apply_pooling(current_array, 'max', kernel_size, stride, padding)
+                current_array, kernel_size, stride = apply_layer(current_array, layer)
+                if layer_type == 'dropout':
+                    cacheable = False
                 
                 # Update receptive field and jump
                 receptive_field = receptive_field + (kernel_size - 1) * jump
                 jump = jump * stride
                 
-            elif layer_type == 'avgpool':
-                # Average pooling layer
-                kernel_size = layer.get('kernel_size', 2)
-                stride = layer.get('stride', kernel_size)
-                padding = layer.get('padding', 0)
-                
-                current_array = apply_pooling(current_array, 'avg', kernel_size, stride, padding)
-                
-                # Update receptive field and jump
-                receptive_field = receptive_field + (kernel_size - 1) * jump
-                jump = jump * stride
+                # Prepare result
+                result = {
+                    'layer_index': layer_idx,
+                    'layer_type': layer_type,
+                    'input_shape': input_shape,
+                    'output_shape': list(current_array.shape),
+                    'receptive_field': receptive_field,
+                    'jump': jump,
+                    'image_format': image_format.lower()
+                }
                 
-            elif layer_type == 'relu':
-                # ReLU activation
-                current_array = np.maximum(0, current_array)
+                # Encode in the background while the next layer runs; layers never
+                # modify their input array, so no copy is needed
+                encode_fn = array_to_image_bytes if binary_output else array_to_base64
+                encode_future = _encode_pool.submit(encode_fn, current_array, image_format)
+                layer_results.append(result)
+                encode_futures.append(encode_future)
                 
-            elif layer_type == 'batchnorm':
-                # Simplified batch normalization
-                mean = np.mean(current_array, axis=(0, 1), keepdims=True)
-                std = np.std(current_array, axis=(0, 1), keepdims=True) + 1e-8
-                current_array = (current_array - mean) / std
+                if cacheable:
+                    layer_cache.set(
+                        (cache_base, tuple(layer_keys[:layer_idx + 1])),
+                        (current_array, receptive_field, jump, tuple(layer_results), tuple(encode_futures))
+                    )
                 
-            elif layer_type == 'dropout':
-                # Simplified dropout for demonstration
-                dropout_rate = layer.get('dropout_rate', 0.1)
-                if dropout_rate > 0:
-                    mask = np.random.random(current_array.shape) > dropout_rate
-                    current_array = current_array * mask
-                    
-            else:
-                return jsonify({'error': f'Unknown layer type: {layer_type}'}), 400
-            
-            # Clip values to [0, 1]
-            current_array = np.clip(current_array, 0, 1)
-            
-            # Get output shape
-            output_shape = list(current_array.shape)
-            
-            # Convert back to base64
-            base64_image = array_to_base64(current_array)
-            
-            # Prepare result
-            result = {
-                'layer_index': layer_idx,
-                'layer_type': layer_type,
-                'base64_image': base64_image,
-                'input_shape': input_shape,
-                'output_shape': output_shape,
-                'receptive_field': receptive_field,
-                'jump': jump
-            }
+                yield layer, result, encode_future
+        
+        def build_result(layer, layer_result, encoded_image):
+            """Assemble the response record for one layer"""
+            # Copy so cached layer results are never modified
+            result = dict(layer_result)
+            if not binary_output:
+                result['base64_image'] = encoded_image
             
             # Add AI insight if requested and available
             if request_ai_insights and g.ai_enabled:
+                layer_type = result['layer_type']
+                input_shape = result['input_shape']
+                output_shape = result['output_shape']
                 try:
                     insight_response = get_layer_insight_internal(layer_type, layer, input_shape, output_shape)
                     result['ai_insight'] = insight_response['insight']
@@ -577,14 +1091,53 @@ def process_layers():
                     result['ai_insight'] = f"This {layer_type} layer processes the image."
                     result['technical_details'] = f"{input_shape} → {output_shape}"
             
-            results.append(result)
+            return result
         
-        return jsonify({
+        if stream_output:
+            def generate():
+                try:
+                    # Emit each layer once the next one has been computed, so
+                    # its encode overlaps with that computation
+                    pending = None
+                    for output in iter_layers():
+                        if pending is not None:
+                            layer, layer_result, encode_future = pending
+                            yield orjson.dumps(build_result(layer, layer_result, encode_future.result())) + b'\n'
+                        pending = output
+                    layer, layer_result, encode_future = pending
+                    yield orjson.dumps(build_result(layer, layer_result, encode_future.result())) + b'\n'
+                    yield orjson.dumps({'success': True, 'done': True, 'ai_enabled': g.ai_enabled}) + b'\n'
+                except Exception as e:
+                    yield orjson.dumps({'error': f'Processing failed: {str(e)}'}) + b'\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        # Collect encoded images in layer order
+        layer_outputs = list(iter_layers())
+        encoded_images = [encode_future.result() for _, _, encode_future in layer_outputs]
+        results = [
+            build_result(layer, layer_result, encoded_image)
+            for (layer, layer_result, _), encoded_image in zip(layer_outputs, encoded_images)
+        ]
+        
+        response_data = {
             'success': True,
             'results': results,
             'ai_enabled': g.ai_enabled
-        })
+        }
+        
+        if binary_output:
+            return build_multipart_response(response_data, encoded_images, image_format)
         
+        # orjson encodes the large base64 strings much faster than jsonify
+        return Response(orjson.dumps(response_data), mimetype='application/json')
+        
+    except RequestEntityTooLarge:
+        raise
+    except Image.DecompressionBombError:
+        return jsonify({'error': 'Image too large'}), 413
+    except binascii.Error:
+        return jsonify({'error': 'Invalid Base64 image data'}), 400
     except Exception as e:
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
 
@@ -622,7 +1175,12 @@ def get_layer_insight_internal(layer_type, layer_params, input_shape, output_sha
         'technical_details': f'{input_shape} → {output_shape}'
     })
 
+# Everything allocated while importing (modules, config, the Flask app,
+# kernels, caches) lives for the whole process
+tune_gc(app.config['GC_THRESHOLD'])
+
 if __name__ == '__main__':
+    # Development server only; production runs gunicorn -c gunicorn_conf.py app:app
     app.run(
         debug=app.config['DEBUG'],
         host=app.config['HOST'],
@@ -2,6 +2,7 @@
 Configuration settings for Visual Neural Network application.
 """
 
+import gc
 import os
 
 class Config:
@@ -16,8 +17,23 @@ class Config:
     PORT = int(os.environ.get('FLASK_PORT', 5001))
     
     # Image processing settings
-    MAX_IMAGE_SIZE = 1024 * 1024 * 5  # 5MB max image size
+    MAX_IMAGE_BYTES = 1024 * 1024 * 5  # 5MB max decoded image size
+    MAX_IMAGE_DIMENSION = 1024  # Larger images are downscaled before processing
+    MAX_IMAGE_PIXELS = 8_000_000  # Decompression bomb limit for PIL
+    MAX_CONTENT_LENGTH = 1024 * 1024 * 10  # 10MB max request body
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff'}
+    LAYER_CACHE_SIZE = 16  # Cached intermediate layer states
+    LAYER_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Total size of cached layer arrays
+    SCRATCH_MAX_BYTES = 32 * 1024 * 1024  # Scratch buffers kept per request thread
+    
+    # Garbage collector settings; request handling allocates many short-lived
+    # objects that refcounting frees, so gen0 sweeps (CPython default: every
+    # 700 allocations) rarely find cycles
+    GC_THRESHOLD = (
+        int(os.environ.get('GC_THRESH0', 50000)),
+        int(os.environ.get('GC_THRESH1', 10)),
+        int(os.environ.get('GC_THRESH2', 10)),
+    )
     
     # CORS settings
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*')
@@ -47,6 +63,17 @@ class TestingConfig(Config):
     TESTING = True
     DEBUG = True
 
+def tune_gc(threshold=Config.GC_THRESHOLD):
+    """
+    Collect once, then freeze the survivors (modules, config, app setup) so
+    later collections no longer rescan them, and apply the GC thresholds.
+    
+    Call once, after everything that lives for the whole process is loaded.
+    """
+    gc.collect(2)
+    gc.freeze()
+    gc.set_threshold(*threshold)
+
 # Configuration mapping
 config = {
     'development': DevelopmentConfig,
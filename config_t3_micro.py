@@ -4,12 +4,21 @@ Memory-optimized configuration for t3.micro (1GB RAM)
 
 import os
 
-class T3MicroConfig:
-    """Optimized configuration for AWS t3.micro instances."""
+from config import Config, tune_gc
+
+class T3MicroConfig(Config):
+    """
+    Optimized configuration for AWS t3.micro instances.
+    
+    Settings not overridden here (GC_THRESHOLD, MAX_IMAGE_PIXELS, ...) come
+    from config.Config. Secrets are not read at import time; pass from_env() to
+    app.config.from_object() to fill them in from the environment.
+    """
     
     # Flask settings
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'change-in-production'
+    SECRET_KEY = 'change-in-production'
     DEBUG = False
+    AUTO_RELOAD = False
     
     # Server settings optimized for t3.micro
     HOST = '127.0.0.1'  # Only bind to localhost (Nginx will proxy)
@@ -20,37 +29,35 @@ class T3MicroConfig:
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max upload
     
     # Gemini API settings
-    GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+    GEMINI_API_KEY = None
     GEMINI_RATE_LIMIT = 5  # Requests per minute
     GEMINI_CACHE_SIZE = 20  # Cached responses
     
     # Image processing limits
-    MAX_IMAGE_SIZE = 512  # Max image dimension for processing
+    MAX_IMAGE_DIMENSION = 512  # Larger images are downscaled before processing
+    MAX_IMAGE_BYTES = 3 * 1024 * 1024  # 3MB max decoded image (4MB as Base64, under MAX_CONTENT_LENGTH)
     COMPRESSION_QUALITY = 70  # JPEG compression for Gemini
+    LAYER_CACHE_SIZE = 8  # Cached intermediate layer states
+    LAYER_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Total size of cached layer arrays
+    SCRATCH_MAX_BYTES = 16 * 1024 * 1024  # Scratch buffers kept per request thread
     
     # CORS settings
     CORS_ORIGINS = ['*']  # Allow all origins (Nginx handles security)
     
+    @classmethod
+    def from_env(cls):
+        """Return a subclass with SECRET_KEY and GEMINI_API_KEY read from the environment."""
+        return type(cls.__name__, (cls,), {
+            'SECRET_KEY': os.environ.get('SECRET_KEY') or cls.SECRET_KEY,
+            'GEMINI_API_KEY': os.environ.get('GEMINI_API_KEY'),
+        })
+    
     @staticmethod
     def optimize_memory():
         """Apply memory optimizations."""
-        import gc
-        
-        # Force garbage collection
-        gc.collect()
-        
-        # Set environment variables for memory optimization
-        os.environ['PYTHONOPTIMIZE'] = '1'
-        os.environ['PYTHONHASHSEED'] = '0'
+        # Same GC settings as the app (GC_THRESH0/1/2, see config.Config)
+        tune_gc()
         
-        # Disable some Python features to save memory
-        try:
-            import sys
-            # Remove unused modules from sys.modules
-            modules_to_remove = [mod for mod in sys.modules.keys() 
-                               if 'test' in mod or 'debug' in mod]
-            for mod in modules_to_remove:
-                if mod in sys.modules:
-                    del sys.modules[mod]
-        except:
-            pass
+        # PYTHONOPTIMIZE and PYTHONHASHSEED are only read at interpreter
+        # startup, so they are set by the systemd unit and the Dockerfile
+        # rather than here
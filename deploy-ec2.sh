@@ -94,7 +94,7 @@ WorkingDirectory=$PROJECT_DIR
 Environment="PATH=$PROJECT_DIR/venv/bin"
 Environment="FLASK_ENV=production"
 Environment="SECRET_KEY=your-super-secret-key-change-this-in-production"
-ExecStart=$PROJECT_DIR/venv/bin/gunicorn -w 2 -b 0.0.0.0:5001 app:app
+ExecStart=$PROJECT_DIR/venv/bin/gunicorn -c gunicorn_conf.py app:app
 Restart=always
 
 [Install]
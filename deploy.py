@@ -4,99 +4,145 @@ Deployment script for Visual Neural Network.
 Supports various deployment environments.
 """
 
+import hashlib
 import os
+import shlex
+import shutil
 import sys
 import subprocess
 import argparse
-from pathlib import Path
 
-def run_command(command, description=""):
-    """Run a shell command and handle errors."""
+def run_command(command, description="", capture=True):
+    """
+    Run a shell command and handle errors.
+    
+    Long-running commands with a lot of output (installs) should pass
+    capture=False to stream it to the terminal instead of buffering it.
+    """
     print(f"🔄 {description or command}")
+    sys.stdout.flush()
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        result = subprocess.run(command, shell=True, check=True, capture_output=capture, text=capture)
         if result.stdout:
             print(f"✅ {result.stdout.strip()}")
         return True
     except subprocess.CalledProcessError as e:
-        print(f"❌ Error: {e.stderr.strip()}")
+        print(f"❌ Error: {e.stderr.strip() if e.stderr else f'exit status {e.returncode}'}")
         return False
 
 def check_requirements():
     """Check if all requirements are installed."""
     print("🔍 Checking requirements...")
     
-    # Check Python version
+    # Check Python version; a missing requirements.txt is reported by the
+    # installer itself in the same call that installs it
     if sys.version_info < (3, 7):
         print("❌ Python 3.7+ is required")
         return False
     
-    # Check if requirements.txt exists
-    if not Path("requirements.txt").exists():
-        print("❌ requirements.txt not found")
-        return False
-    
     print("✅ Requirements check passed")
     return True
 
+# SHA-256 of the requirements.txt last installed into this environment
+INSTALL_MARKER = os.path.join(sys.prefix, ".visual-nn-requirements.sha256")
+
+def requirements_hash():
+    """Return the SHA-256 of requirements.txt, or None if it is missing."""
+    try:
+        with open("requirements.txt", "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
 def install_dependencies(use_uv=True):
-    """Install Python dependencies."""
+    """Install Python dependencies, unless requirements.txt is unchanged since the last install."""
+    requirements_sha = requirements_hash()
+    try:
+        with open(INSTALL_MARKER) as f:
+            installed_sha = f.read().strip()
+    except OSError:
+        installed_sha = None
+    
+    if requirements_sha is not None and requirements_sha == installed_sha:
+        print("✅ Dependencies cached (requirements.txt unchanged since last install)")
+        return True
+    
+    # Install into the interpreter running this script, the same
+    # environment whose prefix holds INSTALL_MARKER
+    python = shlex.quote(sys.executable)
     if use_uv:
-        return run_command("uv pip install -r requirements.txt", "Installing dependencies with uv")
+        installed = run_command(f"uv pip install --python {python} -r requirements.txt", "Installing dependencies with uv", capture=False)
     else:
-        return run_command("pip install -r requirements.txt", "Installing dependencies with pip")
+        installed = run_command(f"{python} -m pip install -r requirements.txt", "Installing dependencies with pip", capture=False)
+    
+    if installed:
+        print("✅ Dependencies installed")
+    if installed and requirements_sha is not None:
+        try:
+            with open(INSTALL_MARKER, "w") as f:
+                f.write(requirements_sha)
+        except OSError:
+            # e.g. a read-only system prefix; the next deploy just installs again
+            pass
+    return installed
+
+def exec_server(argv):
+    """Replace this process with the server, so signals reach it directly."""
+    sys.stdout.flush()
+    os.execvp(argv[0], argv)
 
 def run_development():
     """Run the application in development mode."""
     print("🚀 Starting development server...")
     os.environ['FLASK_ENV'] = 'development'
-    os.system("python app.py")
+    exec_server([sys.executable, "app.py"])
 
 def run_production():
     """Run the application in production mode."""
     print("🚀 Starting production server...")
     os.environ['FLASK_ENV'] = 'production'
     
-    # Check if gunicorn is available for production
-    try:
-        subprocess.check_output(["which", "gunicorn"])
+    # Prefer the gunicorn installed alongside this interpreter, where
+    # install_dependencies put it
+    gunicorn = shutil.which("gunicorn", path=os.path.dirname(sys.executable)) or shutil.which("gunicorn")
+    if gunicorn:
         print("🔄 Starting with Gunicorn...")
-        os.system("gunicorn -w 4 -b 0.0.0.0:5001 app:app")
-    except subprocess.CalledProcessError:
+        exec_server([gunicorn, "-c", "gunicorn_conf.py", "app:app"])
+    else:
         print("⚠️  Gunicorn not found, using Flask development server")
         print("⚠️  For production, install gunicorn: pip install gunicorn")
-        os.system("python app.py")
+        exec_server([sys.executable, "app.py"])
 
-def create_docker_files():
-    """Create Docker configuration files."""
-    dockerfile_content = """FROM python:3.9-slim
+# Docker configuration written by create_docker_files
+DOCKERFILE_CONTENT = """FROM python:3.12-slim
 
 WORKDIR /app
 
-# Install system dependencies
-RUN apt-get update && apt-get install -y \\
-    gcc \\
-    && rm -rf /var/lib/apt/lists/*
-
-# Copy requirements first for better caching
+# Copy requirements first for better caching; every dependency ships
+# manylinux wheels, so no compiler is needed in the image
 COPY requirements.txt .
-RUN pip install --no-cache-dir -r requirements.txt
+RUN pip install --no-cache-dir --only-binary=:all: -r requirements.txt
 
 # Copy application code
 COPY . .
 
+# Precompile bytecode at build time instead of on the first request
+RUN python -m compileall -q -j 0 /app
+
 # Expose port
 EXPOSE 5001
 
 # Set environment variables
 ENV FLASK_ENV=production
 ENV PYTHONUNBUFFERED=1
+ENV PYTHONDONTWRITEBYTECODE=1
+ENV PYTHONHASHSEED=0
 
 # Run the application
-CMD ["python", "app.py"]
+CMD ["gunicorn", "-c", "gunicorn_conf.py", "app:app"]
 """
 
-    dockerignore_content = """__pycache__/
+DOCKERIGNORE_CONTENT = """__pycache__/
 *.pyc
 *.pyo
 *.pyd
@@ -126,7 +172,7 @@ coverage.xml
 *~
 """
 
-    docker_compose_content = """version: '3.8'
+DOCKER_COMPOSE_CONTENT = """version: '3.8'
 
 services:
   visual-nn:
@@ -147,17 +193,33 @@ networks:
     driver: bridge
 """
 
-    # Write Docker files
-    with open("Dockerfile", "w") as f:
-        f.write(dockerfile_content)
-    
-    with open(".dockerignore", "w") as f:
-        f.write(dockerignore_content)
-    
-    with open("docker-compose.yml", "w") as f:
-        f.write(docker_compose_content)
+def write_if_changed(path, content):
+    """Write content to path unless it already matches; return whether it wrote."""
+    try:
+        with open(path) as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, "w") as f:
+        f.write(content)
+    return True
+
+def create_docker_files():
+    """Create Docker configuration files."""
+    # Write Docker files, leaving up-to-date ones untouched
+    files = {
+        "Dockerfile": DOCKERFILE_CONTENT,
+        ".dockerignore": DOCKERIGNORE_CONTENT,
+        "docker-compose.yml": DOCKER_COMPOSE_CONTENT,
+    }
+    written = [path for path, content in files.items() if write_if_changed(path, content)]
+    for path in files:
+        if path not in written:
+            print(f"✅ {path} already up to date")
     
-    print("✅ Docker configuration files created")
+    if written:
+        print(f"✅ Docker configuration files created: {', '.join(written)}")
     print("🐳 To run with Docker:")
     print("   docker build -t visual-nn .")
     print("   docker run -p 5001:5001 visual-nn")
@@ -183,10 +245,11 @@ def main():
         sys.exit(1)
     
     # Install dependencies unless skipped
-    if not args.skip_deps:
-        if not install_dependencies(use_uv=not args.no_uv):
-            print("❌ Failed to install dependencies")
-            sys.exit(1)
+    if args.skip_deps:
+        print("⏭️  Dependencies skipped (--skip-deps)")
+    elif not install_dependencies(use_uv=not args.no_uv):
+        print("❌ Failed to install dependencies")
+        sys.exit(1)
     
     # Run based on mode
     if args.mode == "dev":
@@ -177,7 +177,9 @@ WorkingDirectory=/opt/visual-nn
 Environment=PATH=/opt/visual-nn/venv/bin
 Environment=FLASK_ENV=production
 Environment=PYTHONPATH=/opt/visual-nn
-ExecStart=/opt/visual-nn/venv/bin/python app.py
+# Nginx proxies to 127.0.0.1:5001, so gunicorn only binds to localhost
+Environment=FLASK_HOST=127.0.0.1
+ExecStart=/opt/visual-nn/venv/bin/gunicorn -c gunicorn_conf.py app:app
 Restart=always
 RestartSec=3
 
@@ -4,17 +4,19 @@ Demo script showcasing Visual Neural Network API usage.
 This script demonstrates how to programmatically interact with the CNN visualization tool.
 """
 
-import requests
 import base64
-import json
-from PIL import Image, ImageDraw
 import io
 
+# requests and Pillow are imported inside the functions that use them, so
+# importing this module does not pay for them
+
 # API endpoint
 API_BASE = "http://localhost:5001"
 
 def create_demo_image():
     """Create a simple demo image for testing."""
+    from PIL import Image, ImageDraw
+    
     # Create a 128x128 image with some patterns
     img = Image.new('RGB', (128, 128), color='white')
     draw = ImageDraw.Draw(img)
@@ -28,15 +30,26 @@ def create_demo_image():
     buffer = io.BytesIO()
     img.save(buffer, format='PNG')
     img_data = buffer.getvalue()
-    img_base64 = base64.b64encode(img_data).decode('utf-8')
+    img_base64 = base64.b64encode(img_data).decode('ascii')
     
     return img_base64
 
-def test_health_check():
+def create_session():
+    """Create an HTTP session so all demo requests reuse one keep-alive connection."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    return session
+
+def test_health_check(session):
     """Test the health check endpoint."""
+    import requests
+    
     print("🔍 Testing health check...")
     try:
-        response = requests.get(f"{API_BASE}/")
+        response = session.get(f"{API_BASE}/")
         if response.status_code == 200:
             print(f"✅ Health check passed: {response.text}")
             return True
@@ -47,13 +60,11 @@ def test_health_check():
         print("❌ Cannot connect to server. Make sure it's running on port 5001")
         return False
 
-def test_layer_processing():
+def test_layer_processing(session, img_base64):
     """Test the layer processing endpoint with a demo architecture."""
-    print("🧠 Testing CNN layer processing...")
+    import requests
     
-    # Create demo image
-    img_base64 = create_demo_image()
-    print("📸 Created demo image (128x128 with geometric shapes)")
+    print("🧠 Testing CNN layer processing...")
     
     # Define a sample CNN architecture
     layers = [
@@ -100,7 +111,7 @@ def test_layer_processing():
     
     try:
         # Send request
-        response = requests.post(
+        response = session.post(
             f"{API_BASE}/process-layers",
             json=data,
             headers={'Content-Type': 'application/json'}
@@ -140,36 +151,40 @@ def test_layer_processing():
         print(f"❌ Request error: {e}")
         return False
 
-def test_different_kernels():
+def test_different_kernels(session, img_base64):
     """Test different kernel types."""
     print("🔧 Testing different kernel types...")
     
-    img_base64 = create_demo_image()
     kernel_types = ['sharpen', 'blur', 'gaussian', 'sobel_x', 'sobel_y', 'laplacian', 'emboss']
     
-    for kernel_type in kernel_types:
-        print(f"🔍 Testing {kernel_type} kernel...")
-        
-        data = {
-            "image_base64": img_base64,
-            "layers": [{
-                "type": "conv",
-                "kernel_type": kernel_type,
-                "stride": 1,
-                "padding": 1,
-                "out_channels": 3
-            }]
-        }
+    # Send every kernel as one stacked pipeline, so the image is uploaded and
+    # decoded once and each layer's result reports on one kernel
+    data = {
+        "image_base64": img_base64,
+        "layers": [{
+            "type": "conv",
+            "kernel_type": kernel_type,
+            "stride": 1,
+            "padding": 1,
+            "out_channels": 3
+        } for kernel_type in kernel_types]
+    }
+    
+    try:
+        response = session.post(f"{API_BASE}/process-layers", json=data)
+        result = response.json() if response.status_code == 200 else {}
+        if not result.get('success'):
+            print(f"   ❌ Kernel pipeline failed: {response.status_code}")
+            return
         
-        try:
-            response = requests.post(f"{API_BASE}/process-layers", json=data)
-            if response.status_code == 200 and response.json().get('success'):
-                result_shape = response.json()['results'][0]['output_shape']
-                print(f"   ✅ {kernel_type}: Output shape {result_shape}")
+        results = result['results']
+        for i, kernel_type in enumerate(kernel_types):
+            if i < len(results):
+                print(f"   ✅ {kernel_type}: Output shape {results[i]['output_shape']}")
             else:
                 print(f"   ❌ {kernel_type}: Failed")
-        except Exception as e:
-            print(f"   ❌ {kernel_type}: Error - {e}")
+    except Exception as e:
+        print(f"   ❌ Kernel pipeline error: {e}")
 
 def main():
     """Run all demo tests."""
@@ -178,20 +193,26 @@ def main():
     print("This script tests the CNN visualization API with sample data.")
     print()
     
+    session = create_session()
+    
     # Test health check
-    if not test_health_check():
+    if not test_health_check(session):
         print("❌ Server is not responding. Please start the server first:")
         print("   python app.py")
         return
     
     print()
     
+    # Create the demo image once and reuse it for every test
+    img_base64 = create_demo_image()
+    print("📸 Created demo image (128x128 with geometric shapes)")
+    
     # Test layer processing
-    if test_layer_processing():
+    if test_layer_processing(session, img_base64):
         print()
         
         # Test different kernels
-        test_different_kernels()
+        test_different_kernels(session, img_base64)
         
         print()
         print("🎉 All tests completed successfully!")
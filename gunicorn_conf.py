@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for Visual Neural Network.
+
+Usage:
+    gunicorn -c gunicorn_conf.py app:app
+"""
+
+import os
+
+# Server socket
+bind = f"{os.environ.get('FLASK_HOST', '0.0.0.0')}:{os.environ.get('FLASK_PORT', 5001)}"
+
+# A single threaded worker keeps the layer and Gemini caches in one process;
+# numpy and PIL release the GIL in their C loops, so threads scale.
+# GUNICORN_WORKERS can add processes, capped at one per ~200MB of RAM since
+# each loads Flask, numpy and PIL and holds its own caches
+_memory_mb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+workers = max(1, min(int(os.environ.get('GUNICORN_WORKERS', 1)), _memory_mb // 200))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', max(2, (os.cpu_count() or 1) // 2)))
+timeout = 120
+
+# Import the app once in the master; workers fork from it and share the
+# (gc-frozen) import-time memory copy-on-write
+preload_app = True
+
+# Recycle workers periodically to return fragmented RSS to the OS
+max_requests = 1000
+max_requests_jitter = 50
+
+# Keep native math libraries single-threaded per request to avoid
+# oversubscribing the cores already shared by the request threads
+raw_env = [
+    'OMP_NUM_THREADS=1',
+    'OPENBLAS_NUM_THREADS=1',
+    'MKL_NUM_THREADS=1',
+]
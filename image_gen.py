@@ -2,25 +2,34 @@ from PIL import Image, ImageDraw
 import base64
 import io
 
+# Palette indices and their RGB colors
+WHITE, BLACK, RED, BLUE = range(4)
+PALETTE = [255, 255, 255, 0, 0, 0, 255, 0, 0, 0, 0, 255]
+
 def create_tiny_test_image(size=16):
     """Create a tiny test image for t3.micro testing"""
-    img = Image.new('RGB', (size, size), color='white')
+    # The pattern only uses four colors, so draw with palette indices
+    # (1 byte per pixel and a small PNG) instead of RGB
+    img = Image.new('P', (size, size), WHITE)
+    img.putpalette(PALETTE)
     draw = ImageDraw.Draw(img)
     
     # Draw a simple pattern
     margin = size // 4
-    draw.rectangle([margin, margin, size-margin, size-margin], fill='black')
-    draw.line([0, 0, size-1, size-1], fill='red', width=1)
-    draw.line([0, size-1, size-1, 0], fill='blue', width=1)
+    draw.rectangle([margin, margin, size-margin, size-margin], fill=BLACK)
+    draw.line([0, 0, size-1, size-1], fill=RED, width=1)
+    draw.line([0, size-1, size-1, 0], fill=BLUE, width=1)
     
-    # Save as PNG
+    # Encode as PNG once; the same bytes are saved and Base64-encoded
     filename = f'tiny_test_{size}x{size}.png'
-    img.save(filename)
-    
-    # Convert to base64
     buffer = io.BytesIO()
     img.save(buffer, format='PNG')
-    img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    png_data = buffer.getvalue()
+    with open(filename, 'wb') as f:
+        f.write(png_data)
+    
+    # Convert to base64 (the Base64 alphabet is pure ASCII)
+    img_base64 = base64.b64encode(png_data).decode('ascii')
     
     print(f'Created {filename}')
     print(f'Base64 length: {len(img_base64)}')
@@ -28,8 +37,12 @@ def create_tiny_test_image(size=16):
     
     return filename, img_base64
 
-# Create different sizes
-for size in [16, 32, 64]:
-    create_tiny_test_image(size)
+def main():
+    """Create tiny test images in several sizes"""
+    for size in [16, 32, 64]:
+        create_tiny_test_image(size)
+    
+    print('\nUse these tiny images for testing on t3.micro!')
 
-print('\nUse these tiny images for testing on t3.micro!')
\ No newline at end of file
+if __name__ == '__main__':
+    main()